@@ -2,9 +2,11 @@ import osmnx as ox
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import shapely
 
+from concurrent.futures import ThreadPoolExecutor
 from shapely.geometry import Point, LineString, Polygon, MultiPolygon, MultiLineString
-from shapely.ops import cascaded_union, linemerge, polygonize, polygonize_full, unary_union, nearest_points
+from shapely.ops import linemerge, polygonize, polygonize_full, unary_union
 from .utilities import gdf_from_geometries
 pd.set_option("display.precision", 3)
 
@@ -48,10 +50,9 @@ def road_barriers(place, download_method, distance = 500.0, epsg = None, include
         roads["tunnel"].fillna(0, inplace = True)
         roads = roads[roads["tunnel"] == 0] 
        
-    roads = roads.unary_union
+    roads = _union_geometries(roads)
     roads = _simplify_barrier(roads)
-    df = pd.DataFrame({'geometry': roads, 'type': ['road'] * len(roads)})
-    road_barriers = gpd.GeoDataFrame(df, geometry = df['geometry'], crs = crs)
+    road_barriers = gpd.GeoDataFrame({'type': ['road'] * len(roads)}, geometry = roads, crs = crs)
        
     return road_barriers
     
@@ -92,10 +93,9 @@ def secondary_road_barriers(place, download_method, distance = 500.0, epsg = Non
         roads["tunnel"].fillna(0, inplace = True)
         roads = roads[roads["tunnel"] == 0] 
        
-    roads = roads.unary_union
+    roads = _union_geometries(roads)
     roads = _simplify_barrier(roads)
-    df = pd.DataFrame({'geometry': roads, 'type': ['secondary_road'] * len(roads)})
-    road_barriers = gpd.GeoDataFrame(df, geometry = df['geometry'], crs = crs)
+    road_barriers = gpd.GeoDataFrame({'type': ['secondary_road'] * len(roads)}, geometry = roads, crs = crs)
        
     return road_barriers
 
@@ -123,45 +123,43 @@ def water_barriers(place, download_method, distance = 500.0, lakes_area = 1000,
     """
     
     crs = 'EPSG:' + str(epsg)
+    # a single request for rivers and canals, lakes and sea; the features are then split on their tags
+    tags = {"waterway":True, "natural":["water", "coastline"]}
+    water = _download_geometries(place, download_method, tags, crs, distance)
+    rivers = _tagged_geometries(water, "waterway", ['river', 'canal'])
+    lakes = _tagged_geometries(water, "natural", ['water'])
+    sea = _tagged_geometries(water, "natural", ['coastline'])
+    
     # rivers and canals
-    tags = {"waterway":True}  
-    rivers = _download_geometries(place, download_method, tags, crs, distance)
-    rivers = rivers[(rivers.waterway == 'river') | (rivers.waterway == 'canal')]
     if "tunnel" in rivers.columns:
         rivers["tunnel"].fillna(0, inplace = True)
         rivers = rivers[rivers["tunnel"] == 0] 
         
-    rivers = rivers.unary_union
+    rivers = _union_geometries(rivers)
     rivers = _simplify_barrier(rivers)
     rivers = gdf_from_geometries(rivers, crs)
     
     # lakes   
-    tags = {"natural":"water"}
-    lakes = _download_geometries(place, download_method, tags, crs, distance)  
     to_remove = ['river', 'stream', 'canal', 'riverbank', 'reflecting_pool', 'reservoir', 'bay']
     lakes = lakes[~lakes.water.isin(to_remove)]
     lakes['area'] = lakes.geometry.area
     lakes = lakes[lakes.area > lakes_area]
-    lakes = lakes.unary_union
+    lakes = _union_geometries(lakes)
     
     lakes = _simplify_barrier(lakes) 
     lakes = gdf_from_geometries(lakes, crs)
     lakes = lakes[lakes['length'] >=500]
     
     # sea   
-    tags = {"natural":"coastline"}
-    sea = _download_geometries(place, download_method, tags, crs, distance)
-    sea = sea.unary_union      
+    sea = _union_geometries(sea)
     sea = _simplify_barrier(sea)
     sea = gdf_from_geometries(sea, crs)
     
-    water = rivers.append(lakes)
-    water = water.append(sea)
-    water = water.unary_union
+    water = pd.concat([rivers, lakes, sea], ignore_index = True)
+    water = _union_geometries(water)
     water = _simplify_barrier(water)
         
-    df = pd.DataFrame({'geometry': water, 'type': ['water'] * len(water)})
-    water_barriers = gpd.GeoDataFrame(df, geometry = df['geometry'], crs = crs)
+    water_barriers = gpd.GeoDataFrame({'type': ['water'] * len(water)}, geometry = water, crs = crs)
     
     return water_barriers    
      
@@ -198,6 +196,29 @@ def _download_geometries(place, download_method, tags, crs, distance = 500.0):
     geometries_gdf = geometries_gdf.to_crs(crs)
     return geometries_gdf
     
+def _tagged_geometries(geometries_gdf, key, values):
+    """
+    The function returns the features of a GeoDataFrame downloaded from OSM whose "key" tag takes one of the given values.
+    
+    Parameters
+    ----------
+    geometries_gdf: GeoDataFrame
+        the GeoDataFrame obtained from _download_geometries
+    key: string
+        the OSM tag key, e.g. "natural"
+    values: list of string
+        the admitted values of the tag
+        
+    Returns
+    -------
+    geometries_gdf: GeoDataFrame
+        the filtered GeoDataFrame, possibly empty
+    """
+    
+    if key not in geometries_gdf.columns:
+        return geometries_gdf.iloc[0:0].copy()
+    return geometries_gdf[geometries_gdf[key].isin(values)].copy()
+    
 def railway_barriers(place, download_method, distance = 500.0, epsg = None, keep_light_rail = False):
     """
     The function downloads overground railway structures from OSM. Such structures can be considered barriers which shape the Image of the City and obstruct sight and movement.
@@ -231,13 +252,12 @@ def railway_barriers(place, download_method, distance = 500.0, epsg = None, keep
         railways["tunnel"].fillna(0, inplace = True)
         railways = railways[railways["tunnel"] == 0]     
     
-    r = railways.unary_union
+    r = _union_geometries(railways)
     p = polygonize_full(r)
     railways = unary_union(p).buffer(10).boundary # to simpify a bit
     railways = _simplify_barrier(railways)
         
-    df = pd.DataFrame({'geometry': railways, 'type': ['railway'] * len(railways)})
-    railway_barriers = gpd.GeoDataFrame(df, geometry = df['geometry'], crs = crs)
+    railway_barriers = gpd.GeoDataFrame({'type': ['railway'] * len(railways)}, geometry = railways, crs = crs)
     
     return railway_barriers
     
@@ -270,22 +290,23 @@ def park_barriers(place, download_method, distance = 500.0, epsg = None, min_are
     parks_poly = _download_geometries(place, download_method, tags, crs, distance)
     
     parks_poly = parks_poly[parks_poly.leisure == 'park']
-    parks_poly = parks_poly[~parks_poly['geometry'].is_empty] 
-    parks_poly['area'] = parks_poly.geometry.area
-    parks_poly = parks_poly[parks_poly.area >= min_area]
+    # keeping only the non-empty Polygon and MultiPolygon features (type ids 3 and 6)
+    is_polygon = np.isin(shapely.get_type_id(parks_poly.geometry.values), [3, 6]) & ~shapely.is_empty(parks_poly.geometry.values)
+    parks_poly = parks_poly[is_polygon].copy()
+    parks_poly['area'] = shapely.area(parks_poly.geometry.values)
+    parks_poly = parks_poly[parks_poly['area'] >= min_area]
  
-    pp = parks_poly['geometry'].unary_union  
+    pp = _union_geometries(parks_poly)
     pp = polygonize_full(pp)
     parks = unary_union(pp).buffer(10).boundary # to simpify a bit
     parks = _simplify_barrier(parks)
 
-    df = pd.DataFrame({'geometry': parks, 'type': ['park'] * len(parks)})
-    park_barriers = gpd.GeoDataFrame(df, geometry = df['geometry'], crs = crs)
+    park_barriers = gpd.GeoDataFrame({'type': ['park'] * len(parks)}, geometry = parks, crs = crs)
     
     return park_barriers
     
    
-def along_water(edges_gdf, barriers_gdf):
+def along_water(edges_gdf, barriers_gdf, edges_gdf_sindex = None, barriers_gdf_sindex = None, buffers = None):
     """
     The function assigns to each street segment in a GeoDataFrame the list of barrierIDs corresponding to waterbodies which lay along the street segment. No obstructions between the street segment
     and the barriers are admitted.
@@ -296,6 +317,12 @@ def along_water(edges_gdf, barriers_gdf):
         the street segmentes GeoDataFrame 
     barriers_gdf: LineString GeoDataFrame
         the barriers GeoDataFrame
+    edges_gdf_sindex: Spatial Index
+        spatial index on edges_gdf; when None, the edges_gdf's one is used
+    barriers_gdf_sindex: Spatial Index
+        spatial index on barriers_gdf; when None, the barriers_gdf's one is used. The same index can be passed to assign_structuring_barriers
+    buffers: GeoSeries
+        the 200 m buffers around the street segments, aligned with edges_gdf; when None, they are computed here. Pass them when already available
         
     Returns
     -------
@@ -303,15 +330,23 @@ def along_water(edges_gdf, barriers_gdf):
         the updated street segments GeoDataFrame
     """
     
-    sindex = edges_gdf.sindex
-    tmp = barriers_gdf[barriers_gdf['type'].isin(['water'])]
-    edges_gdf['ac_rivers'] = edges_gdf.apply(lambda row: barriers_along(row['edgeID'], edges_gdf, tmp, sindex, offset = 200), axis = 1)
-    edges_gdf['c_rivers'] = edges_gdf.apply(lambda row: _crossing_barriers(row['geometry'], tmp), axis = 1)
-    edges_gdf['bridge'] = edges_gdf.apply(lambda row: True if len(row['c_rivers']) > 0 else False, axis = 1)
+    if edges_gdf_sindex is None:
+        edges_gdf_sindex = edges_gdf.sindex
+    if barriers_gdf_sindex is None:
+        barriers_gdf_sindex = barriers_gdf.sindex
+    is_water = barriers_gdf['type'].isin(['water']).to_numpy()
+    if buffers is None:
+        buffers = edges_gdf.geometry.buffer(200)
+    along = _intersecting_pairs(buffers, barriers_gdf, barriers_gdf_sindex, is_water, edges_gdf.geometry)
+    along = _visible_pairs(along, edges_gdf, barriers_gdf, edges_gdf_sindex, buffers)
+    crossing = _intersecting_pairs(edges_gdf.geometry, barriers_gdf, barriers_gdf_sindex, is_water)
+    
+    bridge = np.zeros(len(edges_gdf), dtype = bool)
+    bridge[crossing.get_level_values(0)] = True
     # excluding bridges
-    edges_gdf['a_rivers'] = edges_gdf.apply(lambda row: list(set(row['ac_rivers'])-set(row['c_rivers'])), axis = 1)
-    edges_gdf['a_rivers'] = edges_gdf.apply(lambda row: row['ac_rivers'] if not row['bridge'] else [], axis = 1)
-    edges_gdf.drop(['ac_rivers', 'c_rivers'], axis = 1, inplace = True)
+    along = along[~bridge[along.get_level_values(0)]]
+    edges_gdf['bridge'] = bridge
+    edges_gdf['a_rivers'] = _pairs_to_lists(along, edges_gdf.index)
     
     return edges_gdf
 
@@ -333,21 +368,124 @@ def along_within_parks(edges_gdf, barriers_gdf):
         the updated street segments GeoDataFrame
     """
     
-    sindex = edges_gdf.sindex
-    tmp = barriers_gdf[barriers_gdf['type']=='park']
-    # edges_gdf['a_parks'] = edges_gdf.apply(lambda row: barriers_along(row['edgeID'], edges_gdf, tmp, sindex, offset = 200), axis = 1)
-    
     # polygonize parks
     park_polygons = barriers_gdf[barriers_gdf['type']=='park'].copy()
-    park_polygons['geometry'] = park_polygons.apply(lambda row: (polygonize_full(row['geometry']))[0][0], axis = 1)
+    # polygonizing each park's boundary on its own and keeping its first polygon
+    polygons = shapely.polygonize(park_polygons.geometry.to_numpy()[:, np.newaxis])
+    park_polygons['geometry'] = shapely.get_geometry(polygons, 0)
+    park_polygons = park_polygons[park_polygons.geometry.notna()]
     park_polygons = gpd.GeoDataFrame(park_polygons['barrierID'], geometry = park_polygons['geometry'], crs = edges_gdf.crs)
     
-    edges_gdf['w_parks'] = edges_gdf.apply(lambda row: _within_parks(row['geometry'], park_polygons), axis = 1) #within
+    pairs = _intersecting_pairs(edges_gdf.geometry, park_polygons, park_polygons.sindex)
+    edges_gdf['w_parks'] = _pairs_to_lists(pairs, edges_gdf.index) #within
 
 
     return edges_gdf
+
+def _intersecting_pairs(geometries, barriers_gdf, barriers_gdf_sindex, barriers_mask = None, touching_geometries = None):
+    """
+    The function supports the along_water, along_within_parks and assign_structuring_barriers functions. It queries the barriers' spatial index with all the geometries at once and 
+    returns the (position of the geometry, barrierID) pairs of intersecting barriers. Barriers touching the corresponding touching_geometries (by default, 
+    the geometries themselves) are ignored.
+        
+    Parameters
+    ----------
+    geometries: GeoSeries
+        the geometries, e.g. street segments or their buffers
+    barriers_gdf: GeoDataFrame
+        the barriers GeoDataFrame
+    barriers_gdf_sindex: Spatial Index
+        spatial index on barriers_gdf
+    barriers_mask: array of boolean
+        when provided, only the barriers flagged as True (aligned with the rows of barriers_gdf) are considered
+    touching_geometries: GeoSeries
+        the geometries, aligned with and covered by "geometries", that should not touch the barriers
+      
+    Returns
+    -------
+    pairs: MultiIndex
+        the (position of the geometry, barrierID) pairs, sorted
+    """
+    
+    if touching_geometries is None:
+        touching_geometries = geometries
+    barrierIDs = barriers_gdf['barrierID'].to_numpy()
+    
+    intersecting = barriers_gdf_sindex.query(geometries.values, predicate = 'intersects')
+    if barriers_mask is not None:
+        intersecting = intersecting[:, barriers_mask[intersecting[1]]]
+    # touching implies intersecting: the touches predicate is only evaluated on the candidate pairs
+    touching = shapely.touches(touching_geometries.values[intersecting[0]], barriers_gdf.geometry.values[intersecting[1]])
+    intersecting = intersecting[:, ~touching]
+    
+    pairs = pd.MultiIndex.from_arrays([intersecting[0], barrierIDs[intersecting[1]]]).unique().sort_values()
+    return pairs
+
+def _visible_pairs(pairs, edges_gdf, barriers_gdf, edges_gdf_sindex, buffers):
+    """
+    The function supports the along_water function. It discards the (position of the street segment, barrierID) pairs where other street segments,
+    within the buffer of the street segment, lie between the street segment and the barrier.
+        
+    Parameters
+    ----------
+    pairs: MultiIndex
+        the (position of the street segment, barrierID) pairs
+    edges_gdf: LineString GeoDataFrame
+        the street segmentes GeoDataFrame 
+    barriers_gdf: LineString GeoDataFrame
+        the barriers GeoDataFrame
+    edges_gdf_sindex: Spatial Index
+        spatial index on edges_gdf
+    buffers: GeoSeries
+        the buffers around the street segments
+      
+    Returns
+    -------
+    pairs: MultiIndex
+        the pairs with no obstructions between the street segment and the barrier
+    """
     
-def barriers_along(ix_line, edges_gdf, barriers_gdf, edges_gdf_sindex, offset = 100):
+    if len(pairs) == 0:
+        return pairs
+    positions = pairs.get_level_values(0).to_numpy()
+    barrier_geometries = barriers_gdf.set_index('barrierID').geometry.loc[pairs.get_level_values(1)].values
+    # lines from the midpoint of the street segment to the closest point of the barrier
+    midpoints = shapely.line_interpolate_point(edges_gdf.geometry.values[positions], 0.5, normalized = True)
+    lines = shapely.shortest_line(midpoints, barrier_geometries)
+    
+    # other street segments, within the buffer's bounds, crossed by the lines
+    ix_lines, obstructions = edges_gdf_sindex.query(lines, predicate = 'intersects')
+    obstructions_bounds = shapely.bounds(edges_gdf.geometry.values[obstructions])
+    buffers_bounds = shapely.bounds(buffers.values[positions[ix_lines]])
+    within_bounds = ((obstructions_bounds[:, 0] <= buffers_bounds[:, 2]) & (obstructions_bounds[:, 2] >= buffers_bounds[:, 0]) &
+                     (obstructions_bounds[:, 1] <= buffers_bounds[:, 3]) & (obstructions_bounds[:, 3] >= buffers_bounds[:, 1]))
+    obstructed = within_bounds & (obstructions != positions[ix_lines])
+    visible = np.bincount(ix_lines[obstructed], minlength = len(lines)) == 0
+    
+    return pairs[visible]
+
+def _pairs_to_lists(pairs, index):
+    """
+    The function groups the (position, barrierID) pairs into lists of barrierIDs, one per position.
+        
+    Parameters
+    ----------
+    pairs: MultiIndex
+        the (position, barrierID) pairs
+    index: Index
+        the index of the resulting Series
+      
+    Returns
+    -------
+    barriers_lists: Series
+        the lists of barrierIDs, empty when no barriers are found
+    """
+    
+    grouped = pd.Series(pairs.get_level_values(1), index = pairs.get_level_values(0)).groupby(level = 0).agg(list).to_dict()
+    barriers_lists = pd.Series([grouped.get(position, []) for position in range(len(index))], index = index, dtype = object)
+    return barriers_lists
+    
+def barriers_along(ix_line, edges_gdf, barriers_gdf, edges_gdf_sindex, offset = 100, barriers_gdf_sindex = None, buffer = None):
     """
     The function returns list of barrierIDs along the edgeID of a street segment, given a certain offset.
     Touching and intersecting barriers are ignored.
@@ -364,6 +502,10 @@ def barriers_along(ix_line, edges_gdf, barriers_gdf, edges_gdf_sindex, offset =
         spatial index on edges_gdf
     offset: int
         offset along the street segment considered
+    barriers_gdf_sindex: Spatial Index
+        spatial index on barriers_gdf; when None, the barriers_gdf's one is used
+    buffer: Polygon
+        the buffer around the street segment, at the given offset; when None, it is computed here
       
     Returns
     -------
@@ -371,59 +513,30 @@ def barriers_along(ix_line, edges_gdf, barriers_gdf, edges_gdf_sindex, offset =
         a list of barriers along a given street segment
     """
     
-    buffer = edges_gdf.loc[ix_line].geometry.buffer(offset)
-    barriers_along = []
-    intersecting_barriers = barriers_gdf[barriers_gdf.geometry.intersects(buffer)]
-    touching_barriers = barriers_gdf[barriers_gdf.geometry.touches(edges_gdf.loc[ix_line].geometry)]
-    intersecting_barriers = intersecting_barriers[~intersecting_barriers.barrierID.isin(list(touching_barriers.barrierID))]
+    if barriers_gdf_sindex is None:
+        barriers_gdf_sindex = barriers_gdf.sindex
+    if buffer is None:
+        buffer = edges_gdf.loc[ix_line].geometry.buffer(offset)
+    intersecting_barriers = np.sort(barriers_gdf_sindex.query(buffer, predicate = 'intersects'))
+    touching_barriers = barriers_gdf_sindex.query(edges_gdf.loc[ix_line].geometry, predicate = 'touches')
+    intersecting_barriers = np.setdiff1d(intersecting_barriers, touching_barriers, assume_unique = True)
     if len(intersecting_barriers) == 0: 
         return []
     
-    possible_matches_index = list(edges_gdf_sindex.intersection(buffer.bounds))
-    pm = edges_gdf.iloc[possible_matches_index]
-    pm.drop(ix_line, axis = 0, inplace = True)
+    possible_matches_index = edges_gdf_sindex.query(buffer)
+    possible_matches_index = possible_matches_index[possible_matches_index != edges_gdf.index.get_loc(ix_line)]
     
-    for ix, barrier in intersecting_barriers.iterrows():
-        midpoint = edges_gdf.loc[ix_line].geometry.interpolate(0.5, normalized = True)
-        line = LineString([midpoint, nearest_points(midpoint, barrier['geometry'])[1]])
-        if len(pm[pm.geometry.intersects(line)]) >= 1: 
-            continue
-        barriers_along.append(barrier['barrierID'])
+    # lines from the midpoint of the street segment to the closest point of each barrier, checked against the other street segments in one query
+    midpoint = shapely.line_interpolate_point(edges_gdf.loc[ix_line].geometry, 0.5, normalized = True)
+    lines = shapely.shortest_line(midpoint, barriers_gdf.geometry.values[intersecting_barriers])
+    ix_lines, obstructions = edges_gdf_sindex.query(lines, predicate = 'intersects')
+    obstructed = np.isin(obstructions, possible_matches_index)
+    visible = np.bincount(ix_lines[obstructed], minlength = len(lines)) == 0
+    barriers_along = barriers_gdf['barrierID'].to_numpy()[intersecting_barriers[visible]].tolist()
     
-    if len(barriers_along) == 0: 
-        return []
     return barriers_along
-    
-
-    
-def _within_parks(line_geometry, park_polygons):
-    """
-    The function supports the along_within_parks function. Returns a list containing the barrierID of possibly intersecting parks (should be one).
-        
-    Parameters
-    ----------
-    line_geometry: LineString 
-        street segment geometry
-    park_polygons: Polygon GeoDataFrame
-        Parks GeoDataFrame
-      
-    Returns
-    -------
-    within: List
-        a list of street segments within a given park's polygon
-    """
-    
-    within = []
-    intersecting_parks = park_polygons[park_polygons.geometry.intersects(line_geometry)]
-    touching_parks = park_polygons[park_polygons.geometry.touches(line_geometry)]
-    if len(intersecting_parks) == 0: 
-        return within
-    intersecting_parks = intersecting_parks[~intersecting_parks.barrierID.isin(list(touching_parks.barrierID))]
-    within = list(intersecting_parks.barrierID)
-    return within
-    
 
-def assign_structuring_barriers(edges_gdf, barriers_gdf):
+def assign_structuring_barriers(edges_gdf, barriers_gdf, barriers_gdf_sindex = None):
     """
     The function return a GeoDataFrame with an added boolean column field that indicates whether the street segment intersects a separating/structuring barrier.
     
@@ -433,6 +546,8 @@ def assign_structuring_barriers(edges_gdf, barriers_gdf):
         the street segmentes GeoDataFrame 
     barriers_gdf: LineString GeoDataFrame
         the barriers GeoDataFrame
+    barriers_gdf_sindex: Spatial Index
+        spatial index on barriers_gdf; when None, the barriers_gdf's one is used. The same index can be passed to along_water
         
     Returns
     -------
@@ -440,43 +555,20 @@ def assign_structuring_barriers(edges_gdf, barriers_gdf):
         the updated street segments GeoDataFrame
     """
     
-    barriers_gdf = barriers_gdf.copy()
     edges_gdf = edges_gdf.copy()
+    if barriers_gdf_sindex is None:
+        barriers_gdf_sindex = barriers_gdf.sindex
     exlcude = ['secondary_road', 'park'] # parks are disregarded
-    tmp = barriers_gdf[~barriers_gdf['type'].isin(exlcude)].copy() 
+    is_structuring = ~barriers_gdf['type'].isin(exlcude).to_numpy()
     
-    edges_gdf['c_barr'] = edges_gdf.apply(lambda row: _crossing_barriers(row['geometry'], tmp ), axis = 1)
-    edges_gdf['sep_barr'] = edges_gdf.apply(lambda row: True if len(row['c_barr']) > 0 else False, axis = 1)
+    # one bulk query for all the street segments, rather than one query per segment
+    crossing = _intersecting_pairs(edges_gdf.geometry, barriers_gdf, barriers_gdf_sindex, is_structuring)
+    edges_gdf['c_barr'] = _pairs_to_lists(crossing, edges_gdf.index)
+    edges_gdf['sep_barr'] = edges_gdf['c_barr'].map(len).gt(0)
     edges_gdf.drop('c_barr', axis = 1, inplace = True)
     
     return edges_gdf
 
-def _crossing_barriers(line_geometry, barriers_gdf):
-    """
-    The function supports the assign_structuring_barriers and along_water functions. It returns a list of intersecting barrierIDs.
-    
-    Parameters
-    ----------
-    line_geometry: LineString 
-        street segment geometry
-    barriers_gdf: LineString GeoDataFrame
-        the barriers GeoDataFrame
-        
-    Returns
-    -------
-    adjacent_barriers: List
-        a list of adjacent barriers to a given street segment
-    """
-    
-    adjacent_barriers = []
-    intersecting_barriers = barriers_gdf[barriers_gdf.geometry.intersects(line_geometry)]
-    touching_barriers = barriers_gdf[barriers_gdf.geometry.touches(line_geometry)]
-    if len(intersecting_barriers) == 0: 
-        return adjacent_barriers
-    intersecting_barriers = intersecting_barriers[~intersecting_barriers.barrierID.isin(list(touching_barriers.barrierID))]
-    adjacent_barriers = list(intersecting_barriers.barrierID)
-    return adjacent_barriers
-    
 def get_barriers(place, download_method, distance = 500.0, epsg = None): 
     """
     The function returns all the barriers (water, park, railways, major roads) within a certain urban area.
@@ -500,11 +592,13 @@ def get_barriers(place, download_method, distance = 500.0, epsg = None):
         the barriers GeoDataFrame
     """
     
-    rb = road_barriers(place, download_method, distance, epsg, include_primary = True)
-    wb = water_barriers(place, download_method, distance, epsg)
-    ryb = railway_barriers(place,download_method, distance, epsg)
-    pb = park_barriers(place,download_method, distance, epsg, min_area = 100000)
-    barriers_gdf = pd.concat([rb, wb, ryb, pb])
+    # downloading and building the different barriers are independent tasks, mostly waiting on the network and on GEOS
+    with ThreadPoolExecutor(max_workers = 4) as executor:
+        rb = executor.submit(road_barriers, place, download_method, distance, epsg = epsg, include_primary = True)
+        wb = executor.submit(water_barriers, place, download_method, distance, epsg = epsg)
+        ryb = executor.submit(railway_barriers, place, download_method, distance, epsg = epsg)
+        pb = executor.submit(park_barriers, place, download_method, distance, epsg = epsg, min_area = 100000)
+        barriers_gdf = pd.concat([rb.result(), wb.result(), ryb.result(), pb.result()])
     barriers_gdf.reset_index(inplace = True, drop = True)
     barriers_gdf['barrierID'] = barriers_gdf.index.astype(int)
 
@@ -530,7 +624,7 @@ def _simplify_barrier(geometries):
         try:
             geometries = linemerge(geometries)
         except NotImplementedError:
-            geometries = [geometry if geometry.geom_type != 'Polygon' else geometry.boundary for geometry in geometries]
+            geometries = [geometry if geometry.geom_type != 'Polygon' else geometry.boundary for geometry in shapely.get_parts(geometries)]
             if any(isinstance(geometry, MultiLineString) for geometry in geometries):
                 pass
             else:
@@ -539,7 +633,32 @@ def _simplify_barrier(geometries):
     if type(geometries) is LineString: 
         features = [geometries]
     else: 
-        features = geometries
+        features = list(shapely.get_parts(geometries))
     
     return features
+    
+def _union_geometries(geometries, chunk_size = 200):
+    """
+    The function unions the given geometries in chunks and then merges the partial results. On large sets of geometries (e.g. all the rivers or parks
+    of a city) this is considerably faster than a single union call.
+    
+    Parameters
+    ----------
+    geometries: GeoDataFrame, GeoSeries or array of geometries
+        the geometries to union
+    chunk_size: int
+        the number of geometries unioned at once
+        
+    Returns
+    -------
+    union: Geometry
+        the resulting geometry
+    """
+    
+    if isinstance(geometries, (gpd.GeoDataFrame, gpd.GeoSeries)):
+        geometries = geometries.geometry.values
+    geometries = np.asarray(geometries)
+    parts = [shapely.union_all(geometries[i:i+chunk_size]) for i in range(0, len(geometries), chunk_size)]
+    union = shapely.union_all(parts)
+    return union
         
@@ -1,9 +1,10 @@
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import shapely
 
 from shapely.geometry import Point, LineString, Polygon, MultiPolygon, mapping, MultiLineString
-from shapely.ops import cascaded_union, linemerge
+from shapely.ops import linemerge
 from scipy.sparse import linalg
 pd.set_option("display.precision", 3)
 
@@ -27,10 +28,15 @@ def classify_land_use(buildings_gdf, new_land_use_field, land_use_field, categor
     
     buildings_gdf = buildings_gdf.copy()
     
-    # reclassifying: replacing original values with relative categories
-    buildings_gdf[new_land_use_field] = buildings_gdf[land_use_field]
-    for n, category in enumerate(categories):
-        buildings_gdf[new_land_use_field] = buildings_gdf[new_land_use_field].map(lambda x: strings[n] if x in category else x)
+    # reclassifying: replacing original values with relative categories, resolved once per distinct value
+    reclassified = {}
+    for value in buildings_gdf[land_use_field].unique():
+        new_value = value
+        for n, category in enumerate(categories):
+            if new_value in category: 
+                new_value = strings[n]
+        reclassified[value] = new_value
+    buildings_gdf[new_land_use_field] = buildings_gdf[land_use_field].map(reclassified)
     
     return buildings_gdf
 
@@ -57,55 +63,45 @@ def land_use_from_polygons(buildings_gdf, other_source_gdf, column, land_use_fie
     """
     
     buildings_gdf = buildings_gdf.copy()
-    buildings_gdf[column] = None
-    # spatial index
+    buildings_geometries = buildings_gdf.geometry.values
+    # spatial index: looking for intersecting geometries, for all the buildings at once
     sindex = other_source_gdf.sindex
-    buildings_gdf[column] = buildings_gdf.apply(lambda row: _assign_land_use_from_polygons(row["geometry"], other_source_gdf,
-                                                                                           sindex, land_use_field), axis = 1)
+    buildings_idx, other_idx = sindex.query(buildings_geometries, predicate = 'intersects')
+    
+    # computing the extension of the area of intersection of each candidate
+    try:
+        areas = shapely.area(shapely.intersection(buildings_geometries[buildings_idx], other_source_gdf.geometry.values[other_idx]))
+    except shapely.errors.GEOSException:
+        areas = np.array([_intersection_area(buildings_geometries[b], other_source_gdf.geometry.iloc[o]) for b, o in zip(buildings_idx, other_idx)])
+    
+    # taking the best match per building and assigning its land-use category if the area of intersection covers at least 60% of the building's area
+    land_use = np.full(len(buildings_gdf), None, dtype = object)
+    if len(areas) > 0:
+        best = pd.Series(areas).groupby(buildings_idx).idxmax().values
+        matched = areas[best] >= (shapely.area(buildings_geometries[buildings_idx[best]]) * 0.60)
+        land_use[buildings_idx[best][matched]] = other_source_gdf[land_use_field].values[other_idx[best][matched]]
+    buildings_gdf[column] = land_use
     
     return buildings_gdf
     
-def _assign_land_use_from_polygons(building_geometry, other_source_gdf, other_source_gdf_sindex, land_use_field):
+def _intersection_area(building_geometry, other_geometry):
     """
-    It assigns land-use attributes to a building, looking for possible matches in "other_source_gdf".
+    It computes the area of intersection between a building and a geometry in the other source, when the two geometries can not
+    be intersected in bulk (e.g. invalid geometries).
      
     Parameters
     ----------
-    buildings_gdf: Polygon GeoDataFrame
-        buildings GeoDataFrame
-	other_source_gdf: Polygon GeoDataFrame
-		the GeoDataFrame wherein looking for land_use attributes
-    other_source_gdf_sindex: Rtree spatial index
-    land_use_field: string
-        name of the column in other_source_gdf wherein the land_use attribute is stored
+    building_geometry: Polygon
+    other_geometry: Polygon
    
     Returns
     -------
-    Object
+    float
     """   
-    possible_matches_index = list(other_source_gdf_sindex.intersection(building_geometry.bounds)) # looking for intersecting geometries
-    possible_matches = other_source_gdf.iloc[possible_matches_index]
-    pm = possible_matches[possible_matches.intersects(building_geometry)]
-    pm["area"] = 0.0
-    if (len(pm) == 0): 
-        return None# no intersecting features in the other_source_gdf
-
-    for row in pm.itertuples(): # for each possible candidate, computing the extension of the area of intersection
-        other_geometry = pm.loc[row.Index]['geometry']
-        try:
-            overlapping_area = other_geometry.intersection(building_geometry).area
-        except: 
-            continue
-        pm.at[row.Index, "area"] = overlapping_area
-
-    # sorting the matches based on the extent of the area of intersection
-    pm = pm.sort_values(by="area", ascending=False).reset_index()
-    # assigning the match land-use category if the area of intersection covers at least 60% of the building's areas
-    if (pm["area"].iloc[0] >= (building_geometry.area * 0.60)): 
-        return pm[land_use_field].iloc[0]
-     
-    return None
-
+    try:
+        return other_geometry.intersection(building_geometry).area
+    except: 
+        return 0.0
 
 
 def land_use_from_points(buildings_gdf, other_source_gdf, column, land_use_field):
@@ -132,10 +128,11 @@ def land_use_from_points(buildings_gdf, other_source_gdf, column, land_use_field
     
     buildings_gdf = buildings_gdf.copy()    
     other_source_gdf["nr"] = 1
-    buildings_gdf[column] = None
     sindex = other_source_gdf.sindex
-    buildings_gdf[column] = buildings_gdf.apply(lambda row: _assign_land_use_from_points(row["geometry"], other_source_gdf,
-                                                                                         sindex, land_use_field), axis = 1)
+    land_use = np.full(len(buildings_gdf), None, dtype = object)
+    for n, geometry in enumerate(buildings_gdf.geometry.values):
+        land_use[n] = _assign_land_use_from_points(geometry, other_source_gdf, sindex, land_use_field)
+    buildings_gdf[column] = land_use
                
     return buildings_gdf
 
@@ -2,14 +2,16 @@ import osmnx as ox
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import shapely
 
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from shapely.geometry import Point, LineString, Polygon, MultiPolygon, mapping, MultiLineString
-from shapely.ops import cascaded_union, linemerge
+from shapely.ops import linemerge
 from scipy.sparse import linalg
 pd.set_option("display.precision", 3)
 
 from .utilities import scaling_columnDF
-from .angles import get_coord_angle
 
 """
 This set of functions is designed for extracting the computational Image of The City.
@@ -79,7 +81,7 @@ def get_buildings_fromSHP(path, epsg, case_study_area = None, distance_from_cent
 
     # if case-study area is not defined
     if (case_study_area is None): 
-        case_study_area = obstructions_gdf.geometry.unary_union.centroid.buffer(distance_from_center)
+        case_study_area = shapely.union_all(obstructions_gdf.geometry.values).centroid.buffer(distance_from_center)
 
     buildings_gdf = obstructions_gdf[obstructions_gdf.geometry.within(case_study_area)]
     # clipping buildings in the case-study area
@@ -176,7 +178,7 @@ def simplify_footprints(buildings_gdf, crs):
     """  
     
     buildings_gdf = buildings_gdf.copy()
-    single_parts = gpd.geoseries.GeoSeries([geom for geom in buildings_gdf.unary_union.geoms])
+    single_parts = gpd.geoseries.GeoSeries(shapely.get_parts(shapely.union_all(buildings_gdf.geometry.values)))
     single_parts_gdf = gpd.GeoDataFrame(geometry=single_parts, crs = crs)
     
     return single_parts_gdf
@@ -211,33 +213,19 @@ def attach_attributes(buildings_gdf, attributes_gdf, height_field, base_field, l
     attributes_gdf[land_use_field] = attributes_gdf[land_use_field].where(pd.notnull(attributes_gdf[land_use_field]), None)
     if land_use_field in buildings_gdf:
         buildings_gdf.drop(land_use_field, axis = 1, inplace = True)
-    buildings_gdf = gpd.sjoin(buildings_gdf, attributes_gdf[['area', 'geometry', height_field, land_use_field]], how="left", op= 'intersects')
+    buildings_gdf = gpd.sjoin(buildings_gdf, attributes_gdf[['area', 'geometry', height_field, land_use_field]], how="left", predicate = 'intersects')
     
     buildings_gdf['land_use_raw'] = None
-    new_buildings_gdf = buildings_gdf.copy()
-    new_buildings_gdf = new_buildings_gdf[0:0]
     buildings_gdf.reset_index(inplace = True, drop = True)
 
-    new_index = 0
-    builgindIDs = buildings_gdf.buildingID.unique()
-    
-    for bID in builgindIDs:
-        gdf_tmp = buildings_gdf[buildings_gdf.buildingID == bID].copy()
-        new_buildings_gdf.loc[new_index] = gdf_tmp.iloc[0]
-        
-        if len(gdf_tmp) == 1:
-            new_buildings_gdf.at[new_index,'land_use_raw'] = gdf_tmp.iloc[0][land_use_field]
-        else:
-            index_lu = gdf_tmp['area_right'].idxmax()
-            land_use = gdf_tmp.loc[index_lu][land_use_field]
-            if land_use is None:
-                pass
-            else:
-                new_buildings_gdf.at[new_index,'land_use_raw'] = land_use
-       
-        new_buildings_gdf.at[new_index, 'height'] = gdf_tmp[height_field].max()
-        new_buildings_gdf.at[new_index, 'base'] = gdf_tmp[base_field].max()
-        new_index += 1
+    # one record per building: the first one, with the land use of the largest intersecting feature and the maximum height and base
+    groups = buildings_gdf.groupby('buildingID', sort = False)
+    largest = buildings_gdf['area_right'].fillna(-np.inf).groupby(buildings_gdf['buildingID'], sort = False).idxmax()
+    new_buildings_gdf = buildings_gdf.drop_duplicates('buildingID').copy()
+    new_buildings_gdf['land_use_raw'] = buildings_gdf.loc[largest.values, land_use_field].values
+    new_buildings_gdf['height'] = groups[height_field].max().values
+    new_buildings_gdf['base'] = groups[base_field].max().values
+    new_buildings_gdf.reset_index(inplace = True, drop = True)
         
     new_buildings_gdf['area'] = new_buildings_gdf.geometry.area
     new_buildings_gdf.drop([land_use_field, 'area_left', 'area_right', 'index_right'], axis = 1, inplace = True)
@@ -245,7 +233,7 @@ def attach_attributes(buildings_gdf, attributes_gdf, height_field, base_field, l
     return new_buildings_gdf
 
        
-def structural_score(buildings_gdf, obstructions_gdf, edges_gdf, max_expansion_distance = 300, distance_along = 50, radius = 150):
+def structural_score(buildings_gdf, obstructions_gdf, edges_gdf, max_expansion_distance = 300, distance_along = 50, radius = 150, n_workers = None):
     """
     The function computes the structural properties of each building properties.
     
@@ -267,6 +255,8 @@ def structural_score(buildings_gdf, obstructions_gdf, edges_gdf, max_expansion_d
         2d advance visibility - it defines the interval between each line's destination, namely the search angle.
     radius: float
         neighbours - research radius for other adjacent buildings.
+    n_workers: int
+        2d advance visibility - number of processes across which the buildings are split; when None, it is computed in the current process.
         
     Returns
     -------
@@ -279,48 +269,98 @@ def structural_score(buildings_gdf, obstructions_gdf, edges_gdf, max_expansion_d
         obstructions_gdf = buildings_gdf.copy()
     # spatial index
     sindex = obstructions_gdf.sindex
-    street_network = edges_gdf.geometry.unary_union
+    street_network = shapely.line_merge(shapely.union_all(edges_gdf.geometry.values))
 
+    geometries = buildings_gdf.geometry.values
+    
     # distance from road
-    buildings_gdf["road"] =  buildings_gdf.apply(lambda row: row["geometry"].distance(street_network), axis = 1)
+    buildings_gdf["road"] = shapely.distance(geometries, street_network)
     # 2d advance visibility
-    buildings_gdf["2dvis"] = buildings_gdf.apply(lambda row: _advance_visibility(row["geometry"], obstructions_gdf, sindex, max_expansion_distance = max_expansion_distance,
-                                distance_along = distance_along), axis = 1)
-    # neighbours
-    buildings_gdf["neigh"] = buildings_gdf.apply(lambda row: _number_neighbours(row["geometry"], obstructions_gdf, sindex, radius = radius), axis = 1)
+    candidates = _obstructions_around(geometries, sindex, max_expansion_distance)
+    if (n_workers is None) or (n_workers <= 1):
+        visibility = _advance_visibility_buildings(geometries, obstructions_gdf, candidates, max_expansion_distance, distance_along)
+    else:
+        # the buildings are independent from each other: splitting them in as many batches as the processes
+        batches = np.array_split(np.arange(len(geometries)), n_workers)
+        with ProcessPoolExecutor(max_workers = n_workers) as executor:
+            results = executor.map(_advance_visibility_buildings, [geometries[batch] for batch in batches], repeat(obstructions_gdf), 
+                                   [[candidates[n] for n in batch] for batch in batches], repeat(max_expansion_distance), repeat(distance_along))
+            visibility = np.concatenate(list(results))
+    buildings_gdf["2dvis"] = visibility
+    # neighbours: obstructions intersecting the buffer around each building, counted in one bulk query
+    buildings_idx, _ = sindex.query(buildings_gdf.geometry.buffer(radius).values, predicate = 'intersects')
+    buildings_gdf["neigh"] = np.bincount(buildings_idx, minlength = len(buildings_gdf))
     
     return buildings_gdf
-    
-def _number_neighbours(building_geometry, obstructions_gdf, obstructions_sindex, radius):
+
+def _advance_visibility_buildings(buildings_geometries, obstructions_gdf, candidates, max_expansion_distance, distance_along):
     """
-    The function computes a buildings" number of neighbours.
-    "radius" research radius for other adjacent buildings.
+    The function computes the 2d advance visibility of a set of buildings (see _advance_visibility). 
      
     Parameters
     ----------
-    building_geometry: Polygon
+    buildings_geometries: ndarray of Polygon
     obstructions_gdf: Polygon GeoDataFrame
         obstructions GeoDataFrame  
-    obstructions_sindex: Rtree Spatial Index
-    radius: float
-        research radius for other adjacent buildings.
+    candidates: list of ndarray
+        the positions of the obstructions around each building (see _obstructions_around)
+    max_expansion_distance: float
+        it indicates up to which distance from the building boundaries the 2dvisibility polygon can expand.
+    distance_along: float
+        it defines the interval between each line's destination, namely the search angle.
+        
     Returns
     -------
-    int
+    visibility: ndarray
     """
+    
+    sindex = obstructions_gdf.sindex
+    polygons = np.empty(len(buildings_geometries), dtype = object)
+    for n, geometry in enumerate(buildings_geometries):
+        polygons[n] = _advance_visibility(geometry, obstructions_gdf, sindex, max_expansion_distance = max_expansion_distance, distance_along = distance_along,
+                                          possible_obstacles_index = candidates[n])
+    
+    # subtracting the area of the buildings (convex hull for MultiPolygons) and computing the area of the polygons (area of visibility)
+    footprints = np.where(shapely.get_type_id(buildings_geometries) == 6, shapely.convex_hull(buildings_geometries), buildings_geometries)
+    invalid = ~shapely.is_valid(polygons)
+    polygons[invalid] = shapely.buffer(polygons[invalid], 0)
+    visibility = shapely.area(shapely.difference(polygons, footprints))
+    return visibility
+
+def _obstructions_around(buildings_geometries, obstructions_sindex, max_expansion_distance):
+    """
+    The function identifies, for all the buildings at once, the obstructions lying in the area where the 2d advance visibility
+    polygon of each building can expand (i.e. "max_expansion_distance" from the building boundaries, see _advance_visibility).
+     
+    Parameters
+    ----------
+    buildings_geometries: ndarray of Polygon
+    obstructions_sindex: Rtree Spatial Index
+    max_expansion_distance: float
+        it indicates up to which distance from the building boundaries the 2dvisibility polygon can expand.
         
-    buffer = building_geometry.buffer(radius)
-    possible_neigh_index = list(obstructions_sindex.intersection(buffer.bounds))
-    possible_neigh = obstructions_gdf.iloc[possible_neigh_index]
-    precise_neigh = possible_neigh[possible_neigh.intersects(buffer)]
-    return len(precise_neigh)
+    Returns
+    -------
+    list of ndarray
+        the positions of the candidate obstructions, per building
+    """
+    
+    origins = shapely.centroid(buildings_geometries)
+    expansion_distances = max_expansion_distance + shapely.distance(origins, shapely.boundary(shapely.envelope(buildings_geometries)))
+    x, y = shapely.get_x(origins), shapely.get_y(origins)
+    areas = shapely.box(x-expansion_distances, y-expansion_distances, x+expansion_distances, y+expansion_distances)
+    
+    buildings_idx, obstructions_idx = obstructions_sindex.query(areas)
+    order = np.argsort(buildings_idx, kind = 'stable')
+    counts = np.bincount(buildings_idx, minlength = len(buildings_geometries))
+    return np.split(obstructions_idx[order], np.cumsum(counts)[:-1])
 
-def _advance_visibility(building_geometry, obstructions_gdf, obstructions_sindex, max_expansion_distance = 600, distance_along = 20):
+def _advance_visibility(building_geometry, obstructions_gdf, obstructions_sindex, max_expansion_distance = 600, distance_along = 20, possible_obstacles_index = None):
 
     """
-    It creates a 2d polygon of visibility around a building. The extent of this polygon is assigned as a 2d advance
-    visibility measure. The polygon is built constructing lines around the centroid, breaking them at obstructions and connecting 
-    the new formed geometries to get the final polygon.
+    It creates a 2d polygon of visibility around a building. The extent of this polygon, minus the building's footprint, is assigned as 
+    a 2d advance visibility measure (see _advance_visibility_buildings). The polygon is built constructing lines around the centroid, 
+    breaking them at obstructions and connecting the new formed geometries to get the final polygon.
     "max_expansion_distance" indicates up to which distance from the building boundaries the visibility polygon can expand.
     "distance_along" defines the interval between each line's destination, namely the search angle.
      
@@ -335,10 +375,13 @@ def _advance_visibility(building_geometry, obstructions_gdf, obstructions_sindex
         it indicates up to which distance from the building boundaries the 2dvisibility polygon can expand.
     distance_along: float
         it defines the interval between each line's destination, namely the search angle.
+    possible_obstacles_index: ndarray
+        positions of the obstructions around the building, when already identified (see _obstructions_around)
 
     Returns
     -------
-    float
+    poly: Polygon
+        the polygon of visibility, building's footprint included
     """
       
     # creating buffer
@@ -350,62 +393,81 @@ def _advance_visibility(building_geometry, obstructions_gdf, obstructions_sindex
     max_expansion_distance = max_expansion_distance + origin.distance(building_geometry.envelope.exterior)
     
     # identifying obstructions in an area of x (max_expansion_distance) mt around the building
-    possible_obstacles_index = list(obstructions_sindex.intersection(origin.buffer(max_expansion_distance).bounds))
-    possible_obstacles = obstructions_gdf.iloc[possible_obstacles_index]
-    possible_obstacles = obstructions_gdf[obstructions_gdf.geometry != building_geometry]
-    possible_obstacles = obstructions_gdf[~obstructions_gdf.geometry.within(no_holes)]
-
-    start = 0.0
-    i = start
-    list_lines = [] # list of lines
-    
-    # creating lines all around the building till a defined distance
-    while(i <= 360):
-        coords = get_coord_angle([origin.x, origin.y], distance = max_expansion_distance, angle = i)
-        line = LineString([origin, Point(coords)])
-        
-        # finding actual obstacles to this line
-        obstacles = possible_obstacles[possible_obstacles.crosses(line)]
-
-        
-        """
-        if there are obstacles: indentify where the line from the origin is interrupted, create the geometry and
-        append it to the list of lines
-        """
-        
-        if len(obstacles) > 0:
-            ob = cascaded_union(obstacles.geometry)
-            t = line.intersection(ob)
-            # taking the coordinates
-            try: 
-                intersection = t[0].coords[0]
-            except: 
-                intersection = t.coords[0]
-            lineNew = LineString([origin, Point(intersection)])
-        
-        # the line is not interrupted, keeping the original one
-        else: 
-            lineNew = line 
-
-        list_lines.append(lineNew)
-        # increase the angle
-        i = i+distance_along
+    if possible_obstacles_index is None:
+        possible_obstacles_index = list(obstructions_sindex.intersection(origin.buffer(max_expansion_distance).bounds))
+    # excluding, amongst these, the building itself and the obstructions within its footprint
+    possible_obstacles_index = np.asarray(possible_obstacles_index, dtype = np.intp)
+    possible_obstacles_index = possible_obstacles_index[~shapely.within(obstructions_gdf.geometry.values[possible_obstacles_index], no_holes)]
+
+    # creating lines all around the building till a defined distance, every "distance_along" degrees (angles with the y axis)
+    angles = np.arange(0.0, 360.0+distance_along, distance_along)
+    angles = np.radians(angles[angles <= 360.0])
+    origin_coords = np.array([origin.x, origin.y])
+    list_coords = origin_coords + max_expansion_distance * np.column_stack([np.sin(angles), np.cos(angles)])
+    list_lines = shapely.linestrings(np.stack([np.broadcast_to(origin_coords, list_coords.shape), list_coords], axis = 1))
+    
+    # finding actual obstacles to all the lines at once, through the spatial index
+    lines_idx, obstacles_idx = obstructions_sindex.query(list_lines, predicate = 'crosses')
+    is_possible = np.isin(obstacles_idx, possible_obstacles_index)
+    lines_idx, obstacles_idx = lines_idx[is_possible], obstacles_idx[is_possible]
+    
+    # identifying where each line from the origin is interrupted (if it is) and shortening it accordingly
+    fractions = _first_obstacle_along(origin_coords, list_coords, lines_idx, obstructions_gdf.geometry.values[obstacles_idx])
+    list_coords = origin_coords + fractions[:, None] * (list_coords - origin_coords)
    
     # creating a polygon of visibility based on the lines and their progression, taking into account the origin Point too    
-    list_points = [Point(origin)]
-    for i in list_lines: 
-        list_points.append(Point(i.coords[1]))
-    list_points.append(Point(origin))
-    poly = Polygon([[p.x, p.y] for p in list_points])
-    
-    # subtracting the area of the building and computing the area of the polygon (area of visibility)
-    try: 
-        poly_vis = poly.difference(building_geometry)
-    except:
-        pp = poly.buffer(0)
-        poly_vis = pp.difference(building_geometry)      
+    poly = Polygon(np.vstack([origin_coords, list_coords, origin_coords]))
+    return poly
+
+def _first_obstacle_along(origin_coords, destinations, lines_idx, obstacles):
+    """
+    Given a set of lines departing from the same origin and the obstacles that each of them crosses, it computes the fraction
+    of each line's length at which the line meets its first obstacle. The intersections between the lines and the obstacles'
+    rings are solved analytically, for all the pairs at once.
+     
+    Parameters
+    ----------
+    origin_coords: ndarray
+        the coordinates of the origin of the lines
+    destinations: ndarray
+        (n, 2) array of the coordinates of the lines' destinations
+    lines_idx: ndarray
+        for each line-obstacle pair, the position of the line in destinations
+    obstacles: ndarray of Polygon
+        for each line-obstacle pair, the obstacle's geometry
+   
+    Returns
+    -------
+    fractions: ndarray
+        1.0 for the lines that are not interrupted
+    """
     
-    return poly_vis.area
+    fractions = np.ones(len(destinations))
+    if len(obstacles) == 0:
+        return fractions
+    
+    # decomposing the obstacles in the segments of their rings, keeping track of the line each segment is paired with
+    parts, parts_idx = shapely.get_parts(obstacles, return_index = True)
+    rings, rings_idx = shapely.get_rings(parts, return_index = True)
+    coords, coords_idx = shapely.get_coordinates(rings, return_index = True)
+    same_ring = coords_idx[1:] == coords_idx[:-1]
+    start, end = coords[:-1][same_ring], coords[1:][same_ring]
+    segments_line = lines_idx[parts_idx[rings_idx[coords_idx[:-1][same_ring]]]]
+
+    # origin + t*direction = start + u*segment, for t and u in [0, 1]
+    direction = destinations[segments_line] - origin_coords
+    segment = end - start
+    offset = start - origin_coords
+    denominator = direction[:, 0]*segment[:, 1] - direction[:, 1]*segment[:, 0]
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        t = (offset[:, 0]*segment[:, 1] - offset[:, 1]*segment[:, 0])/denominator
+        u = (offset[:, 0]*direction[:, 1] - offset[:, 1]*direction[:, 0])/denominator
+    hit = (denominator != 0.0) & (t >= 0.0) & (t <= 1.0) & (u >= 0.0) & (u <= 1.0)
+    np.minimum.at(fractions, segments_line[hit], t[hit])
+    
+    # an obstacle covering the origin interrupts the line straight away
+    fractions[lines_idx[shapely.intersects(obstacles, shapely.points(origin_coords))]] = 0.0
+    return fractions
     
 def visibility_score(buildings_gdf, sight_lines = pd.DataFrame({'a' : []}), method = 'longest'):
 
@@ -434,15 +496,20 @@ def visibility_score(buildings_gdf, sight_lines = pd.DataFrame({'a' : []}), meth
     sight_lines['nodeID'] = sight_lines['nodeID'].astype(int)
     sight_lines['buildingID'] = sight_lines['buildingID'].astype(int)
     
-    #facade area (roughly computed)
-    buildings_gdf["fac"] = buildings_gdf.apply(lambda row: _facade_area(row["geometry"], row["height"]), axis = 1)
+    #facade area (roughly computed): the shorter side of the envelope times the height
+    bounds = shapely.bounds(buildings_gdf.geometry.values)
+    width = np.minimum(bounds[:, 2]-bounds[:, 0], bounds[:, 3]-bounds[:, 1])
+    buildings_gdf["fac"] = width*buildings_gdf["height"]
 
     
     # 3d visibility
     sight_lines = sight_lines.copy()
     sight_lines.drop(["Shape_Leng", "DIST_ALONG", "visible", "Visibility"], axis = 1, inplace = True, errors = "ignore")
-    sight_lines["length"] = sight_lines["geometry"].length
-    sight_lines = sight_lines.sort_values(['buildingID', 'nodeID', 'length'],ascending=[False, False, False]).drop_duplicates(['buildingID', 'nodeID'], keep='first')
+    sight_lines["length"] = shapely.length(sight_lines["geometry"].values)
+    sight_lines.reset_index(inplace = True, drop = True)
+    # keeping only the longest sight line between each building and node (in descending order of building and node)
+    longest = sight_lines.groupby(['buildingID', 'nodeID'])['length'].idxmax()
+    sight_lines = sight_lines.loc[longest.values[::-1]]
     sight_lines.reset_index(inplace = True, drop = True)
        
     # stats
@@ -471,27 +538,6 @@ def visibility_score(buildings_gdf, sight_lines = pd.DataFrame({'a' : []}), meth
     
     return buildings_gdf, sight_lines
 
-def _facade_area(building_geometry, building_height):
-
-    """
-    The function roughly computes the facade area of a building, given its geometry and height
-     
-    Parameters
-    ----------
-    building_geometry: Polygon
-    building_height: float
-   
-    Returns
-    -------
-    float
-    """
-    
-    envelope = building_geometry.envelope
-    coords = mapping(envelope)["coordinates"][0]
-    d = [(Point(coords[0])).distance(Point(coords[1])), (Point(coords[1])).distance(Point(coords[2]))]
-    width = min(d)
-    return width*building_height
- 
 def get_historical_buildings_fromOSM(place, download_method, epsg = None, distance = 1000):
     """    
     The function downloads and cleans buildings footprint geometries and create a buildings GeoDataFrames for the area of interest.
@@ -574,42 +620,18 @@ def cultural_score_from_dataset(buildings_gdf, historical_elements_gdf, score =
     buildings_gdf = buildings_gdf.copy()
     # spatial index
     sindex = historical_elements_gdf.sindex 
-    buildings_gdf["cult"] = 0
-    ix_geo = buildings_gdf.columns.get_loc("geometry")+1 
-    
-    buildings_gdf["cult"] = buildings_gdf.apply(lambda row: _compute_cultural_score_building(row["geometry"], historical_elements_gdf, sindex, score = score), axis = 1)
-    return buildings_gdf
+    # pairs of buildings and intersecting historical elements, retrieved at once
+    buildings_idx, elements_idx = sindex.query(buildings_gdf.geometry.values, predicate = 'intersects')
     
-def _compute_cultural_score_building(building_geometry, historical_elements_gdf, historical_elements_gdf_sindex, score = None):
-
-    """
-    Compute pragmatic for a single building. It supports the function "pragmatic_meaning" 
-     
-    Parameters
-    ----------
-    buildings_geometry: Polygon
-    building_land_use: string
-    historical_elements_gdf_sindex: Rtree spatial index
-    score: string
-   
-    Returns
-    -------
-    float
-    """
-
-    possible_matches_index = list(historical_elements_gdf_sindex.intersection(building_geometry.bounds)) # looking for possible candidates in the external GDF
-    possible_matches = historical_elements_gdf.iloc[possible_matches_index]
-    pm = possible_matches[possible_matches.intersects(building_geometry)]
-
     if (score is None):
-        cs = len(pm) # score only based on number of intersecting elements
-    elif len(pm) == 0: 
-        cs = 0
-    else: cs = pm[score].sum() # otherwise sum the scores of the intersecting elements
+        # score only based on number of intersecting elements
+        buildings_gdf["cult"] = np.bincount(buildings_idx, minlength = len(buildings_gdf))
+    else:
+        # otherwise sum the scores of the intersecting elements
+        scores = pd.Series(historical_elements_gdf[score].values[elements_idx]).groupby(buildings_idx).sum()
+        buildings_gdf["cult"] = scores.reindex(range(len(buildings_gdf)), fill_value = 0).values
     
-    return cs
-
-
+    return buildings_gdf
 
 def cultural_score_from_OSM(buildings_gdf):
 
@@ -658,43 +680,18 @@ def pragmatic_score(buildings_gdf, radius = 200):
     """  
     
     buildings_gdf = buildings_gdf.copy()   
-    buildings_gdf["nr"] = 1 # to count
     sindex = buildings_gdf.sindex # spatial index
-    buildings_gdf["prag"] = buildings_gdf.apply(lambda row: _compute_pragmatic_meaning_building(row.geometry, row.land_use, buildings_gdf, sindex, radius), axis = 1)
-    buildings_gdf.drop('nr', axis = 1, inplace = True)
-    return buildings_gdf
-    
-def _compute_pragmatic_meaning_building(building_geometry, building_land_use, buildings_gdf, buildings_gdf_sindex, radius):
-
-    """
-    Compute pragmatic for a single building. It supports the function "pragmatic_meaning" 
-     
-    Parameters
-    ----------
-    buildings_geometry: Polygon
-    building_land_use: String
-    buildings_gdf: Polygon GeoDataFrame
-        buildings GeoDataFrame - case study area
-    buildings_gdf_sindex: Rtree Spatial index
-    radius: float
-   
-    Returns
-    -------
-    float
-    """
-
-    buffer = building_geometry.buffer(radius)
-    possible_matches_index = list(buildings_gdf_sindex.intersection(buffer.bounds))
-    possible_matches = buildings_gdf.iloc[possible_matches_index]
-    pm = possible_matches [possible_matches.intersects(buffer)]
-    neigh = pm.groupby(["land_use"], as_index = True)["nr"].sum() 
-
-    Nj = neigh.loc[building_land_use] # nr of neighbours with same land_use
+    # pairs of buildings and neighbours within the area around them, retrieved at once
+    buildings_idx, neighbours_idx = sindex.query(buildings_gdf.geometry.buffer(radius).values, predicate = 'intersects')
+    # comparing land uses as integer codes (missing values share the same code)
+    land_use, _ = pd.factorize(buildings_gdf["land_use"])
+    same_land_use = land_use[buildings_idx] == land_use[neighbours_idx]
+    
+    Nj = np.bincount(buildings_idx[same_land_use], minlength = len(buildings_gdf)) # nr of neighbours with same land_use
+    N = np.bincount(buildings_idx, minlength = len(buildings_gdf))
     # Pj = Nj/N
-    Pj = 1-(Nj/pm["nr"].sum()) # inverting the value
-        
-    return Pj
-        
+    buildings_gdf["prag"] = 1-(Nj/N) # inverting the value
+    return buildings_gdf
         
 def compute_global_scores(buildings_gdf, g_cW, g_iW):
     """
@@ -732,17 +729,7 @@ def compute_global_scores(buildings_gdf, g_cW, g_iW):
             g_cW['pScore'] += to_add
             g_cW['vScore'] = 0.0
       
-    for i in col: 
-        if buildings_gdf[i].max() == 0.0: 
-            buildings_gdf[i+"_sc"] = 0.0
-        else: 
-            scaling_columnDF(buildings_gdf, i)
-    
-    for i in col_inverse: 
-        if buildings_gdf[i].max() == 0.0: 
-            buildings_gdf[i+"_sc"] = 0.0
-        else: 
-            scaling_columnDF(buildings_gdf, i, inverse = True) 
+    buildings_gdf[[i+"_sc" for i in col+col_inverse]] = _rescale_columns(buildings_gdf[col+col_inverse], inverse = col_inverse)
   
     # computing scores   
     buildings_gdf["vScore"] = buildings_gdf["fac_sc"]*g_iW["fac"] + buildings_gdf["height_sc"]*g_iW["height"] + buildings_gdf["3dvis_sc"]*g_iW["3dvis"]
@@ -750,11 +737,7 @@ def compute_global_scores(buildings_gdf, g_cW, g_iW):
     
     # rescaling components
     col = ["vScore", "sScore"]
-    for i in col: 
-        if buildings_gdf[i].max() == 0.0: 
-            buildings_gdf[i+"_sc"] = 0.0
-        else: 
-            scaling_columnDF(buildings_gdf, i)
+    buildings_gdf[[i+"_sc" for i in col]] = _rescale_columns(buildings_gdf[col])
     
     buildings_gdf["cScore"] = buildings_gdf["cult_sc"]
     buildings_gdf["pScore"] = buildings_gdf["prag_sc"]
@@ -767,6 +750,32 @@ def compute_global_scores(buildings_gdf, g_cW, g_iW):
     
     return buildings_gdf
 
+def _rescale_columns(df, inverse = ()):
+
+    """
+    The function rescales from 0 to 1 several columns of a DataFrame at once, with a single min/max reduction over them.
+    Columns whose maximum value is 0.0 are set to 0.0.
+    
+    Parameters
+    ----------
+    df: pandas DataFrame
+        the columns to rescale
+    inverse: list of string
+        the columns to rescale from 1 to 0 instead of 0 to 1
+   
+    Returns
+    -------
+    scaled: ndarray
+    """
+    
+    values = df.to_numpy(dtype = float)
+    min_values, max_values = np.nanmin(values, axis = 0), np.nanmax(values, axis = 0)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        scaled = (values-min_values)/(max_values-min_values)
+    to_invert = df.columns.isin(inverse)
+    scaled[:, to_invert] = 1-scaled[:, to_invert]
+    return np.where(max_values == 0.0, 0.0, scaled)
+
 
 
 def compute_local_scores(buildings_gdf, l_cW, l_iW, radius = 1500):
@@ -801,70 +810,60 @@ def compute_local_scores(buildings_gdf, l_cW, l_iW, radius = 1500):
     buildings_gdf["lScore"] = 0.0
     buildings_gdf["vScore_l"], buildings_gdf["sScore_l"] = 0.0, 0.0
     
-    # recomputing the scores per each building in relation to its neighbours, in an area whose extent is regulated by the parameter "radius"
-    buildings_gdf["lScore"] = buildings_gdf.apply(lambda row: _building_local_score(row["geometry"], row["buildingID"], buildings_gdf, sindex, l_cW, l_iW, radius), axis = 1)
+    # pairs of buildings and neighbours in an area whose extent is regulated by the parameter "radius", retrieved at once
+    buildings_idx, neighbours_idx = sindex.query(buildings_gdf.geometry.buffer(radius).values, predicate = 'intersects')
+    
+    # recomputing the scores per each building in relation to its neighbours: each neighbour's values are rescaled within the
+    # area of each building it falls in (in single precision, as there is one value per building-neighbour pair)
+    col = ["3dvis", "fac", "height", "area","2dvis", "cult","prag"]
+    col_inverse = ["neigh", "road"]
+    sc = {}
+    for i in col:
+        sc[i] = _rescale_by_building(buildings_gdf[i].to_numpy(dtype = np.float32)[neighbours_idx], buildings_idx)
+    for i in col_inverse:
+        sc[i] = _rescale_by_building(buildings_gdf[i].to_numpy(dtype = np.float32)[neighbours_idx], buildings_idx, inverse = True)
+    
+    vScore_l = sc["fac"]*l_iW["fac"] + sc["height"]*l_iW["height"] + buildings_gdf["3dvis"].to_numpy(dtype = np.float32)[neighbours_idx]*l_iW["3dvis"]
+    sScore_l = sc["area"]*l_iW["area"]+ sc["neigh"]*l_iW["neigh"] + sc["road"]*l_iW["road"] + sc["2dvis"]*l_iW["fac"]
+    vScore_l_sc = _rescale_by_building(vScore_l, buildings_idx)
+    sScore_l_sc = _rescale_by_building(sScore_l, buildings_idx)
+    lScore = vScore_l_sc*l_cW["vScore"] + sScore_l_sc*l_cW["sScore"] + sc["cult"]*l_cW["cScore"] + sc["prag"]*l_cW["pScore"]
+    
+    # each building's score is the one obtained in its own area
+    own = buildings_idx == neighbours_idx
+    local_scores = np.full(len(buildings_gdf), np.nan)
+    local_scores[buildings_idx[own]] = [float("{0:.3f}".format(score)) for score in lScore[own]]
+    buildings_gdf["lScore"] = local_scores
     scaling_columnDF(buildings_gdf, "lScore")
     return buildings_gdf
     
-def _building_local_score(building_geometry, buildingID, buildings_gdf, buildings_gdf_sindex, l_cW, l_iW, radius):
+def _rescale_by_building(values, buildings_idx, inverse = False):
 
     """
-    The function computes landmarkness at the local level for a single building. 
-
+    The function rescales from 0 to 1 the values of the neighbours of each building, within the group of neighbours of that building.
+    Groups whose maximum value is 0.0 are set to 0.0.
     
     Parameters
     ----------
-    building_geometry: Polygon
-    buildingID: int
-    buildings_gdf: Polygon GeoDataFrame
-    buildings_gdf_sindex: Rtree spatial index
-    l_cW: dictionary
-    l_iW: dictionary
-    radius: float
-        regulates the extension of the area wherein the scores are recomputed, around the building
+    values: ndarray
+        the values of the neighbours, one per building-neighbour pair
+    buildings_idx: ndarray
+        the building each pair refers to
+    inverse: boolean
+        if true, rescales from 1 to 0 instead of 0 to 1
    
     Returns
     -------
-    score: Float
+    scaled: ndarray
     """
-                                             
-    col = ["3dvis", "fac", "height", "area","2dvis", "cult","prag"]
-    col_inverse = ["neigh", "road"]
     
-    buffer = building_geometry.buffer(radius)
-    possible_matches_index = list(buildings_gdf_sindex.intersection(buffer.bounds))
-    possible_matches = buildings_gdf.iloc[possible_matches_index].copy()
-    pm = possible_matches[possible_matches.intersects(buffer)]
-    
-    # rescaling the values 
-    for i in col: 
-        if pm[i].max() == 0.0: 
-            pm[i+"_sc"] = 0.0
-        else:
-            scaling_columnDF(pm, i) 
-    for i in col_inverse: 
-        if pm[i].max() == 0.0: 
-            pm[i+"_sc"] = 0.0
-        else:
-            scaling_columnDF(pm, i, inverse = True)
-    
-    # and recomputing scores
-    pm["vScore_l"] =  pm["fac_sc"]*l_iW["fac"] + pm["height_sc"]*l_iW["height"] + pm["3dvis"]*l_iW["3dvis"]
-    pm["sScore_l"] =  pm["area_sc"]*l_iW["area"]+ pm["neigh_sc"]*l_iW["neigh"] + pm["road_sc"]*l_iW["road"] + pm["2dvis_sc"]*l_iW["fac"]
-    pm["cScore_l"] = pm["cult_sc"]
-    pm["pScore_l"] = pm["prag_sc"]
-    
-    col_rs = ["vScore_l", "sScore_l"]
-    for i in col_rs: 
-        if pm[i].max() == 0.0: 
-            pm[i+"_sc"] = 0.0
-        else:
-            scaling_columnDF(pm, i)
-        
-    pm["lScore"] =  pm["vScore_l_sc"]*l_cW["vScore"] + pm["sScore_l_sc"]*l_cW["sScore"] + pm["cScore_l"]*l_cW["cScore"] + pm["pScore_l"]*l_cW["pScore"]
-    score = float("{0:.3f}".format(pm["lScore"].loc[buildingID]))
-    # return the so obtined score
-    return score
+    groups = pd.Series(values).groupby(buildings_idx)
+    min_values, max_values = groups.transform("min").values, groups.transform("max").values
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        scaled = (values-min_values)/(max_values-min_values)
+    if inverse:
+        scaled = 1-scaled
+    return np.where(max_values == 0.0, 0.0, scaled)
 
 class Error(Exception):
     """Base class for other exceptions"""
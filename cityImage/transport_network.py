@@ -4,6 +4,7 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 import pandas as pd
 import numpy as np
 import geopandas as gpd
+import shapely
 from shapely.geometry import Point, LineString, Polygon, MultiPoint
 from shapely.ops import split, unary_union
 import osmnx as ox
@@ -12,7 +13,7 @@ pd.set_option("display.precision", 3)
 
 from .clean import duplicate_nodes, correct_edges, clean_network
 from .load import obtain_nodes_gdf, join_by_coordinates
-from .utilities import distance_geometry_gdf
+from .utilities import split_line_at_interpolation
 
 clean_settings = {'remove_disconnected_islands' : False, 'dead_ends' : False, 'same_uv_edges' : False, 'self_loops' : True, 'fix_topology' : False}
 
@@ -94,15 +95,16 @@ def gdfs_from_railways(railways_gdf, epsg):
     edges_gdf["key"] = 0
     
     # creating the dataframes
-    geometries = edges_gdf['geometry'].apply(lambda geom: geom.wkb)
+    geometries = pd.Series(shapely.to_wkb(edges_gdf.geometry.values), index = edges_gdf.index)
     edges_gdf = edges_gdf.loc[geometries.drop_duplicates().index]
     
     standard_columns = ["geometry", "from", "to", "key", "name"]
     edges_gdf = edges_gdf[standard_columns]
-    edges_gdf['code'], edges_gdf['coords'] = None, None
+    edges_gdf['code'] = None
 
     # remove z coordinates, if any
-    edges_gdf["geometry"] = edges_gdf.apply(lambda row: LineString([coor for coor in [row["geometry"].coords[i][0:2] for i in range(0, len(row["geometry"].coords))]]), axis = 1)
+    if edges_gdf.geometry.has_z.any():
+        edges_gdf["geometry"] = shapely.force_2d(edges_gdf.geometry.values)
     
     # assigning indexes
     nodes_gdf = obtain_nodes_gdf(edges_gdf, crs)
@@ -121,11 +123,12 @@ def gdfs_from_railways(railways_gdf, epsg):
     
     # Reordering coordinates to allow for comparison between edges
     nodes_gdf, edges_gdf = duplicate_nodes(nodes_gdf, edges_gdf)
-    edges_gdf['coords'] = [list(c.coords) for c in edges_gdf.geometry]
-    edges_gdf['coords'][(edges_gdf.u.astype(str)+"-"+edges_gdf.v.astype(str)) != edges_gdf.code] = [list(x.coords)[::-1] for x in edges_gdf.geometry]
+    geometries = np.asarray(edges_gdf.geometry.values)
+    to_reverse = ((edges_gdf.u.astype(str)+"-"+edges_gdf.v.astype(str)) != edges_gdf.code).to_numpy()
+    geometries = np.where(to_reverse, shapely.reverse(geometries), geometries)
     
     # dropping edges with same geometry but with coords in different orders (depending on their directions)    
-    edges_gdf['tmp'] = edges_gdf['coords'].apply(tuple, 1)  
+    edges_gdf['tmp'] = shapely.to_wkb(geometries)
     edges_gdf.drop_duplicates(['tmp'], keep = 'first', inplace = True)
     #eliminate node-lines
     edges_gdf = edges_gdf[~((edges_gdf['u'] == edges_gdf['v']) & (edges_gdf['geometry'].length < 1.00))]     
@@ -137,75 +140,115 @@ def gdfs_from_railways(railways_gdf, epsg):
 def assign_stations_to_nodes(stations_gdf, nodes_gdf, edges_gdf, name_field):
     
     nodes_gdf, edges_gdf = nodes_gdf.copy(), edges_gdf.copy()
-    nodes_gdf['stationID'] = 999999
+    nodes_gdf['stationID'] = np.full(len(nodes_gdf), 999999, dtype = np.int64)
     nodes_gdf['name'] = None
-               
-    for row in stations_gdf.itertuples():
-
-        station_geometry = stations_gdf.loc[row.Index].geometry
+    
+    # closest node and closest edge of each station, for all the stations at once
+    closest_nodes, dist_nodes = _nearest_geometries(stations_gdf, nodes_gdf)
+    closest_edges, dist_edges = _nearest_geometries(stations_gdf, edges_gdf)
+    close = (dist_nodes <= 50) | (dist_edges <= 50)
+    on_node = close & (dist_nodes <= dist_edges)
+    on_edge = close & ~on_node
+    
+    nodes_gdf.loc[closest_nodes[on_node], 'stationID'] = stations_gdf.index[on_node].astype(np.int64)
+    nodes_gdf.loc[closest_nodes[on_node], 'name'] = stations_gdf[name_field].values[on_node]
+    
+    # the remaining stations split their closest edge; new nodeIDs and edge indexes follow the order of the stations
+    stations_on_edges = stations_gdf[on_edge].copy()
+    stations_on_edges['edge'] = closest_edges[on_edge]
+    stations_on_edges['nodeID'] = nodes_gdf.index.max() + 1 + np.arange(len(stations_on_edges))
+    stations_on_edges['new_index'] = edges_gdf.index.max() + 1 + np.arange(len(stations_on_edges))
+    stations_on_edges['along'] = edges_gdf.loc[stations_on_edges['edge']].geometry.project(stations_on_edges.geometry, align = False).values
+    
+    # an edge close to several stations is split from its start onwards: each new piece starts at a station and ends at the next one
+    new_nodes, new_edges = [], []
+    for index_edge, stations in stations_on_edges.groupby('edge'):
+        stations = stations.sort_values('along', kind = 'stable')
+        edge = edges_gdf.loc[index_edge]
+        line_geometry = edge.geometry
+        geometries = []
+        for row in stations.itertuples():
+            lines, point = split_line_at_interpolation(row.geometry, line_geometry)
+            geometries.append(lines[0])
+            line_geometry = lines[1]
+            new_nodes.append({'geometry': point, 'nodeID': row.nodeID, 'stationID': row.Index, 'name': stations.at[row.Index, name_field]})
+        geometries.append(line_geometry)
         
-        dist_nodes = distance_geometry_gdf(station_geometry, nodes_gdf)
-        dist_edges = distance_geometry_gdf(station_geometry, edges_gdf)
-            
-        if (dist_nodes[0]> 50) & (dist_edges[0]>50):
-            continue
-        elif (dist_nodes[0] <= dist_edges[0]):
-            nodes_gdf.at[dist_nodes[1], 'stationID'] = row.Index
-            nodes_gdf.at[dist_nodes[1], 'name'] = stations_gdf.loc[row.Index][name_field]
-        else:
-            index_edge = dist_edges[1]
-            lines, point = split_line_at_interpolation(station_geometry, edges_gdf.loc[index_edge].geometry)
-            nodeID = nodes_gdf.index.max()+1
-            
-            nodes_gdf.at[nodeID, 'geometry'] = point
-            nodes_gdf.at[nodeID, 'nodeID'] = nodeID
-            nodes_gdf.at[nodeID, 'stationID'] = row.Index
-            nodes_gdf.at[nodeID, 'name'] = stations_gdf.loc[row.Index][name_field]
-            
-            new_index = edges_gdf.index.max()+1
-            edges_gdf.loc[new_index] = edges_gdf.loc[index_edge]
-            edges_gdf.at[index_edge, 'geometry'] =  lines[0]
-            edges_gdf.at[index_edge, 'v'] = nodeID
-            
-            edges_gdf.at[new_index, 'geometry'] = lines[1]
-            edges_gdf.at[new_index, 'edgeID'] = new_index
-            edges_gdf.at[new_index, 'u'] = nodeID
+        nodeIDs = list(stations['nodeID'])
+        edges_gdf.at[index_edge, 'geometry'] = geometries[0]
+        edges_gdf.at[index_edge, 'v'] = nodeIDs[0]
+        for n, new_index in enumerate(stations['new_index']):
+            new_edge = edge.copy()
+            new_edge['geometry'], new_edge['edgeID'] = geometries[n+1], new_index
+            new_edge['u'], new_edge['v'] = nodeIDs[n], nodeIDs[n+1] if n+1 < len(nodeIDs) else edge.v
+            new_edge.name = new_index
+            new_edges.append(new_edge)
+    
+    # appending the new nodes and edges at once
+    if len(new_nodes) > 0:
+        new_nodes = gpd.GeoDataFrame(new_nodes, index = [node['nodeID'] for node in new_nodes], crs = nodes_gdf.crs)
+        nodes_gdf = pd.concat([nodes_gdf, new_nodes.sort_index()])
+        new_edges = gpd.GeoDataFrame(pd.DataFrame(new_edges).infer_objects(), crs = edges_gdf.crs)
+        edges_gdf = pd.concat([edges_gdf, new_edges.sort_index()])
                
-    nodes_gdf['stationID'] = nodes_gdf['stationID'].astype(int)
     nodes_gdf['nodeID'] = nodes_gdf['nodeID'].astype(int)
     
     nodes_gdf.index = nodes_gdf['nodeID'].astype(int)
     nodes_gdf.index.name = None        
-    nodes_gdf['x'], nodes_gdf['y'] = list(zip(*[(r.coords[0][0], r.coords[0][1]) for r in nodes_gdf.geometry]))
+    nodes_gdf['x'], nodes_gdf['y'] = nodes_gdf.geometry.x, nodes_gdf.geometry.y
     edges_gdf = correct_edges(nodes_gdf, edges_gdf )
     
     return nodes_gdf, edges_gdf
     
+def _nearest_geometries(gdf, other_gdf):
+    """
+    It returns, for each geometry of a GeoDataFrame, the index of the closest geometry in another GeoDataFrame and their distance.
+    
+    Parameters
+    ----------
+    gdf: GeoDataFrame
+    other_gdf: GeoDataFrame
+    
+    Returns:
+    ----------
+    indexes, distances: tuple
+        the indexes of the closest geometries in other_gdf and the corresponding distances, aligned with gdf
+    """
+    
+    (positions, other_positions), distances = other_gdf.sindex.nearest(gdf.geometry.values, return_all = False, return_distance = True)
+    order = np.argsort(positions, kind = 'stable')
+    indexes, distances = other_gdf.index[other_positions[order]], distances[order]
+    return indexes, distances
+    
 def dissolve_stations(nodes_gdf, edges_gdf):
    
     nodes_gdf, edges_gdf = nodes_gdf.copy(), edges_gdf.copy()
     nodes_gdf, edges_gdf = simplify_stations(nodes_gdf, edges_gdf)
     nodes_gdf, edges_gdf = merge_station_nodes(nodes_gdf, edges_gdf)
-    nodes_gdf, edges_gdf = simplify_stations(nodes_gdf, edges_gdf)   
+    # a second pass is needed only when the merge left edges between nodes of the same station
+    names_u, names_v = nodes_gdf.loc[edges_gdf.u, 'name'].values, nodes_gdf.loc[edges_gdf.v, 'name'].values
+    if ((names_u == names_v) & pd.notna(names_u)).any():
+        nodes_gdf, edges_gdf = simplify_stations(nodes_gdf, edges_gdf)   
     return nodes_gdf, edges_gdf
     
 def simplify_stations(nodes_gdf, edges_gdf):
         # same station is at u and v of an edge
     nodes_gdf, edges_gdf = nodes_gdf.copy(), edges_gdf.copy()
     to_drop = []
+    edges_by_node = _edges_by_node(edges_gdf)
     for row in edges_gdf.itertuples():
-        u,v  = edges_gdf.loc[row.Index].u, edges_gdf.loc[row.Index].v
+        u,v  = edges_gdf.at[row.Index, 'u'], edges_gdf.at[row.Index, 'v']
 
-        if (nodes_gdf.loc[u]['name'] == nodes_gdf.loc[v]['name']) & (nodes_gdf.loc[u]['name'] is not None):
-            edges_gdf.loc[edges_gdf.u == v, 'u'] = u
-            edges_gdf.loc[edges_gdf.v == v, 'v'] = u
-            centroid = nodes_gdf.loc[[u,v]].geometry.unary_union.centroid
+        if (nodes_gdf.at[u, 'name'] == nodes_gdf.at[v, 'name']) & (nodes_gdf.at[u, 'name'] is not None):
+            _relabel_node(edges_gdf, edges_by_node, v, u)
+            point_u, point_v = nodes_gdf.at[u, 'geometry'], nodes_gdf.at[v, 'geometry']
+            centroid = Point((point_u.x + point_v.x)/2, (point_u.y + point_v.y)/2)
             nodes_gdf.at[u, 'geometry'] = centroid
             to_drop.append(v)
 
     nodes_gdf.drop(to_drop, axis = 0, inplace = True)
     edges_gdf = edges_gdf[~((edges_gdf.u.isin(to_drop)) & (edges_gdf.v.isin(to_drop)))]
-    nodes_gdf['x'], nodes_gdf['y'] = list(zip(*[(r.coords[0][0], r.coords[0][1]) for r in nodes_gdf.geometry]))
+    nodes_gdf['x'], nodes_gdf['y'] = nodes_gdf.geometry.x, nodes_gdf.geometry.y
     edges_gdf = correct_edges(nodes_gdf, edges_gdf)
     nodes_gdf['nodeID'] = nodes_gdf['nodeID'].astype(int)
     nodes_gdf, edges_gdf = clean_network(nodes_gdf, edges_gdf, **clean_settings)
@@ -217,72 +260,128 @@ def merge_station_nodes(nodes_gdf, edges_gdf, tolerance = 40):
     
     nodes_gdf, edges_gdf = nodes_gdf.copy(), edges_gdf.copy()
     to_drop = []
-    old_edges_gdf = edges_gdf.copy()
+    edges_by_node = _edges_by_node(edges_gdf)
+    # the loop reads the edges as they were before any merge
+    old_edges = list(zip(edges_gdf['u'].values, edges_gdf['v'].values, edges_gdf.geometry.length.values))
 
-    for row in old_edges_gdf.itertuples():
-        u,v  = old_edges_gdf.loc[row.Index].u, old_edges_gdf.loc[row.Index].v
-        if old_edges_gdf.loc[row.Index].geometry.length > tolerance:
+    for u, v, length in old_edges:
+        if length > tolerance:
             continue
 
-        if ((nodes_gdf.loc[u]['stationID'] != nodes_gdf.loc[v]['stationID']) & 
-             ((nodes_gdf.loc[u]['stationID'] == 999999) | (nodes_gdf.loc[v]['stationID'] == 999999))):
+        if ((nodes_gdf.at[u, 'stationID'] != nodes_gdf.at[v, 'stationID']) & 
+             ((nodes_gdf.at[u, 'stationID'] == 999999) | (nodes_gdf.at[v, 'stationID'] == 999999))):
 
-            if nodes_gdf.loc[u]['stationID'] != 999999: 
+            if nodes_gdf.at[u, 'stationID'] != 999999: 
                 nodeID = u
                 drop = v
             else: 
                 nodeID = v
                 drop = u
 
-            centroid = nodes_gdf.loc[[u,v]].geometry.unary_union.centroid
+            point_u, point_v = nodes_gdf.at[u, 'geometry'], nodes_gdf.at[v, 'geometry']
+            centroid = Point((point_u.x + point_v.x)/2, (point_u.y + point_v.y)/2)
             nodes_gdf.at[nodeID, 'geometry'] = centroid
-            edges_gdf.loc[edges_gdf.u == drop, 'u'] = nodeID
-            edges_gdf.loc[edges_gdf.v == drop, 'v'] = nodeID
+            _relabel_node(edges_gdf, edges_by_node, drop, nodeID)
             to_drop.append(drop)
 
     nodes_gdf.drop(to_drop, axis = 0, inplace = True)
     edges_gdf = edges_gdf[~((edges_gdf.u.isin(to_drop)) & (edges_gdf.v.isin(to_drop)))]
-    nodes_gdf['x'], nodes_gdf['y'] = list(zip(*[(r.coords[0][0], r.coords[0][1]) for r in nodes_gdf.geometry]))
+    nodes_gdf['x'], nodes_gdf['y'] = nodes_gdf.geometry.x, nodes_gdf.geometry.y
     edges_gdf = correct_edges(nodes_gdf, edges_gdf)
     nodes_gdf['nodeID'] = nodes_gdf['nodeID'].astype(int)
     nodes_gdf, edges_gdf = clean_network(nodes_gdf, edges_gdf, **clean_settings)
 
     return nodes_gdf, edges_gdf
     
+def _edges_by_node(edges_gdf):
+    """
+    It maps each node to the indexes of the edges starting ('u') and ending ('v') at the node.
+    
+    Parameters
+    ----------
+    edges_gdf: LineString GeoDataFrame
+        the edges GeoDataFrame
+    
+    Returns:
+    ----------
+    edges_by_node: dict
+        for 'u' and 'v', a dictionary {nodeID: list of edge indexes}
+    """
+    
+    edges_by_node = {column: {node: list(index) for node, index in edges_gdf.groupby(column).groups.items()} for column in ['u', 'v']}
+    return edges_by_node
+    
+def _relabel_node(edges_gdf, edges_by_node, old_nodeID, nodeID):
+    """
+    It replaces old_nodeID with nodeID in the 'u' and 'v' columns of the edges GeoDataFrame, in place, and keeps edges_by_node up to date.
+    
+    Parameters
+    ----------
+    edges_gdf: LineString GeoDataFrame
+        the edges GeoDataFrame
+    edges_by_node: dict
+        the mapping returned by _edges_by_node
+    old_nodeID, nodeID: int
+        the node to replace and its replacement
+    """
+    
+    for column, edges_by_column in edges_by_node.items():
+        index = edges_by_column.pop(old_nodeID, [])
+        edges_gdf.loc[index, column] = nodeID
+        edges_by_column.setdefault(nodeID, []).extend(index)
+    
 def extend_stations(nodes_gdf, edges_gdf):
     
     nodes_gdf, edges_gdf = nodes_gdf.copy(), edges_gdf.copy()
     tmp_nodes = nodes_gdf[nodes_gdf.stationID != 999999]
     
-    for row in tmp_nodes.itertuples():
-        tmp_edges = edges_gdf[edges_gdf.intersects(tmp_nodes.loc[row.Index].geometry.buffer(25))]
-        tmp_edges = tmp_edges[(tmp_edges.u != row.Index) & (tmp_edges.v != row.Index)]
-        if len(tmp_edges) == 0: 
-            continue
-        for e in tmp_edges.itertuples():
-            lines, point = split_line_at_interpolation(tmp_nodes.loc[row.Index].geometry, edges_gdf.loc[e.Index].geometry)
+    # the edges within 25 meters from each station, for all the stations at once
+    buffers = tmp_nodes.geometry.buffer(25)
+    ix_stations, ix_edges = edges_gdf.sindex.query(buffers.values, predicate = 'intersects')
+    candidates_by_station = pd.Series(edges_gdf.index[ix_edges]).groupby(ix_stations).agg(list)
+    is_station = nodes_gdf.stationID != 999999
+    
+    # the split edges are collected and written back at once; each original edge keeps track of the pieces it is split into
+    pieces, split_edges = {}, {}
+    new_index = edges_gdf.index.max()+1
+    
+    for n, row in enumerate(tmp_nodes.itertuples()):
+        buffer = buffers.iloc[n]
+        candidates = candidates_by_station.get(n, [])
+        tmp_edges = sorted((index, candidate) for candidate in candidates for index in pieces.get(candidate, [candidate]))
+        tmp_edges = [(split_edges[index] if index in split_edges else edges_gdf.loc[index], candidate) for index, candidate in tmp_edges]
+        tmp_edges = [(edge, candidate) for edge, candidate in tmp_edges if (edge.u != row.Index) & (edge.v != row.Index) & edge.geometry.intersects(buffer)]
+        
+        for edge, candidate in tmp_edges:
+            lines, point = split_line_at_interpolation(tmp_nodes.at[row.Index, 'geometry'], edge.geometry)
             
             # check if there's actually another station already around
-            if (point.distance(tmp_nodes.loc[row.Index].geometry) > 
-               distance_geometry_gdf(point, nodes_gdf[(nodes_gdf.stationID != 999999) & (nodes_gdf.nodeID != row.Index)])[0]):
+            if (point.distance(tmp_nodes.at[row.Index, 'geometry']) > 
+               nodes_gdf[is_station & (nodes_gdf.nodeID != row.Index)].geometry.distance(point).min()):
                 continue
                 
-            station_u = nodes_gdf.loc[edges_gdf.loc[e.Index].u]['name']
-            station_v  = nodes_gdf.loc[edges_gdf.loc[e.Index].v]['name']
-            if ((station_u == nodes_gdf.loc[row.Index]['name']) | 
-                (station_v == nodes_gdf.loc[row.Index]['name'])): continue
+            station_u = nodes_gdf.at[edge.u, 'name']
+            station_v  = nodes_gdf.at[edge.v, 'name']
+            if ((station_u == nodes_gdf.at[row.Index, 'name']) | 
+                (station_v == nodes_gdf.at[row.Index, 'name'])): continue
                     
-            nodes_gdf.at[row.Index, 'geometry'] = MultiPoint([tmp_nodes.loc[row.Index].geometry.coords[0], point.coords[0]]).centroid
-            new_index = edges_gdf.index.max()+1
-            edges_gdf.loc[new_index] = edges_gdf.loc[e.Index]
-            edges_gdf.at[e.Index, 'geometry'] =  lines[0]
-            edges_gdf.at[e.Index, 'v'] = row.Index
+            nodes_gdf.at[row.Index, 'geometry'] = MultiPoint([tmp_nodes.at[row.Index, 'geometry'].coords[0], point.coords[0]]).centroid
+            new_edge = edge.copy()
+            edge = edge.copy()
+            edge['geometry'], edge['v'] = lines[0], row.Index
+            new_edge['geometry'], new_edge['edgeID'], new_edge['u'] = lines[1], new_index, row.Index
+            new_edge.name = new_index
+            split_edges[edge.name], split_edges[new_index] = edge, new_edge
             
-            edges_gdf.at[new_index, 'geometry'] = lines[1]
-            edges_gdf.at[new_index, 'edgeID'] = new_index
-            edges_gdf.at[new_index, 'u'] = row.Index
+            pieces[candidate] = pieces.get(candidate, [candidate]) + [new_index]
+            new_index += 1
+    
+    if len(split_edges) > 0:
+        split_edges = gpd.GeoDataFrame(pd.DataFrame(list(split_edges.values())).infer_objects(), crs = edges_gdf.crs)
+        order = list(edges_gdf.index) + sorted(split_edges.index.difference(edges_gdf.index))
+        edges_gdf = pd.concat([edges_gdf.drop(split_edges.index, errors = 'ignore'), split_edges]).loc[order]
     
-    nodes_gdf['x'], nodes_gdf['y'] = list(zip(*[(r.coords[0][0], r.coords[0][1]) for r in nodes_gdf.geometry]))
+    nodes_gdf['x'], nodes_gdf['y'] = nodes_gdf.geometry.x, nodes_gdf.geometry.y
     edges_gdf = correct_edges(nodes_gdf, edges_gdf)
     
     local_settings = clean_settings.copy()
@@ -26,9 +26,9 @@ def scaling_columnDF(df, column, inverse = False):
     ----------
     """
     
-    df[column+"_sc"] = (df[column]-df[column].min())/(df[column].max()-df[column].min())
-    if inverse: 
-        df[column+"_sc"] = 1-(df[column]-df[column].min())/(df[column].max()-df[column].min())
+    min_value, max_value = df[column].min(), df[column].max()
+    scaled = (df[column]-min_value)/(max_value-min_value)
+    df[column+"_sc"] = 1-scaled if inverse else scaled
         
     
 def dict_to_df(list_dict, list_col):
@@ -295,11 +295,12 @@ def convex_hull_wgs(gdf):
 def rescale_ranges(n, range1, range2):
     """
     Given a value n and the range which it belongs to, the function rescale the value, given a different range.
+    n can also be a list or an array of values, which are rescaled at once.
         
     Parameters
     ----------
-    n: int, float
-        a value
+    n: int, float, list or array
+        a value or an array of values
     range1: tuple
         a certain range, e.g. (0, 1) or (10.5, 100). The value n should be within this range
     range2: tuple
@@ -307,12 +308,12 @@ def rescale_ranges(n, range1, range2):
         
     Return
     ----------
-    value: float
-        the rescaled value
+    value: float or array
+        the rescaled value(s)
     """
     delta1 = range1[1] - range1[0]
     delta2 = range2[1] - range2[0]
-    value = (delta2 * (n - range1[0]) / delta1) + range2[0]    
+    value = (delta2 * (np.asarray(n) - range1[0]) / delta1) + range2[0]    
     return value
                          
 def gdf_from_geometries(geometries, crs):
@@ -330,8 +331,7 @@ def gdf_from_geometries(geometries, crs):
         the resulting GeoDataFrame
     """
     
-    df = pd.DataFrame({'geometry': geometries})
-    gdf = gpd.GeoDataFrame(df, geometry = df['geometry'], crs = crs)
+    gdf = gpd.GeoDataFrame(geometry = geometries, crs = crs)
     gdf['length'] = gdf['geometry'].length
     return gdf
     
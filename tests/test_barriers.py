@@ -0,0 +1,44 @@
+"""Unit tests for the barriers module."""
+
+import geopandas as gpd
+
+from shapely.geometry import LineString
+
+import cityImage as ci
+
+# toy layout: a river along y = 100, a railway, a secondary road and a square park south of the river
+epsg = 3003
+
+def _edges():
+    lines = [LineString([(0, 0), (200, 0)]), # along the river
+             LineString([(400, 0), (600, 0)]), # along the river, but the next segment lies in between
+             LineString([(450, 50), (550, 50)]), # along the river
+             LineString([(700, 0), (700, 200)]), # bridge
+             LineString([(900, 0), (900, 100)]), # touching the river, crossing the railway
+             LineString([(50, -300), (250, -300)]), # within the park
+             LineString([(0, -200), (300, -200)]), # on the park's boundary
+             LineString([(250, -300), (400, -300)])] # entering the park
+    edges_gdf = gpd.GeoDataFrame({'edgeID': range(len(lines))}, geometry = lines, crs = epsg)
+    return edges_gdf
+
+def _barriers():
+    barriers = [LineString([(0, 100), (1000, 100)]),
+                LineString([(850, 50), (950, 50)]),
+                LineString([(100, -50), (100, 50)]),
+                LineString([(0, -400), (300, -400), (300, -200), (0, -200), (0, -400)])]
+    barriers_gdf = gpd.GeoDataFrame({'type': ['water', 'railway', 'secondary_road', 'park']}, geometry = barriers, crs = epsg)
+    barriers_gdf['barrierID'] = [10, 11, 12, 13]
+    return barriers_gdf
+
+def test_along_water():
+    edges_gdf = ci.along_water(_edges(), _barriers())
+    assert edges_gdf['a_rivers'].tolist() == [[10], [], [10], [], [], [], [], []]
+    assert edges_gdf['bridge'].tolist() == [False, False, False, True, False, False, False, False]
+
+def test_along_within_parks():
+    edges_gdf = ci.along_within_parks(_edges(), _barriers())
+    assert edges_gdf['w_parks'].tolist() == [[], [], [], [], [], [13], [], [13]]
+
+def test_assign_structuring_barriers():
+    edges_gdf = ci.assign_structuring_barriers(_edges(), _barriers())
+    assert edges_gdf['sep_barr'].tolist() == [False, False, False, True, True, False, False, False]
@@ -0,0 +1,38 @@
+"""Unit tests for the landmarks module."""
+
+import pytest
+import geopandas as gpd
+
+from shapely.geometry import LineString, Polygon, box
+
+import cityImage as ci
+
+# toy layout: a 10 x 10 building centred on the origin; with max_expansion_distance = 100 and distance_along = 90, the sight lines
+# are cast northwards, eastwards, southwards and westwards, up to 105 m from the centroid (100 m plus the half side of the building)
+epsg = 3003
+building = box(-5, -5, 5, 5)
+# a wall interrupting the eastward line at 50 m
+wall = box(50, -200, 60, 200)
+# an L-shaped obstacle reached by the northward line at 40 m: the line runs along its edge from (0, 40) to (0, 50), and is parallel to
+# its sides at x = -10 and x = 10
+corner = Polygon([(-10, 40), (0, 40), (0, 50), (10, 50), (10, 70), (-10, 70)])
+
+def _structural_score(obstructions):
+    buildings_gdf = gpd.GeoDataFrame({'buildingID': [0]}, geometry = [building], crs = epsg)
+    obstructions_gdf = gpd.GeoDataFrame(geometry = obstructions, crs = epsg)
+    edges_gdf = gpd.GeoDataFrame(geometry = [LineString([(-200, -100), (200, -100)])], crs = epsg)
+    return ci.structural_score(buildings_gdf, obstructions_gdf, edges_gdf, max_expansion_distance = 100, distance_along = 90)
+
+def test_structural_score_no_obstacles():
+    buildings_gdf = _structural_score([building])
+    # a square with a 105 m half diagonal, minus the building's footprint
+    assert buildings_gdf['2dvis'].iloc[0] == pytest.approx(2 * 105**2 - 100)
+    assert buildings_gdf['road'].iloc[0] == pytest.approx(95)
+    assert buildings_gdf['neigh'].iloc[0] == 1
+
+def test_structural_score_obstacles():
+    buildings_gdf = _structural_score([building, wall, corner])
+    # the quadrilateral (0, 40), (50, 0), (0, -105), (-105, 0), minus the building's footprint
+    visible = (40 * 50 + 50 * 105 + 105 * 105 + 105 * 40) / 2
+    assert buildings_gdf['2dvis'].iloc[0] == pytest.approx(visible - 100)
+    assert buildings_gdf['neigh'].iloc[0] == 3